@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+"""Parser for ACCEL EDA / P-CAD ASCII netlist files.
+
+The netlist is an s-expression tree, so the reader follows Peter
+Norvig's lispy: a tokenizer feeding a recursive reader, and an eval()
+that turns each (head arg ...) form into a Python object (CompInst,
+Net, Netlist, ...).  Board-specific processing (the 1621 card) walks
+the resulting object model.
+"""
+
+import argparse
+import mmap
+import re
+import sys
+from array import array
+
+
+class Symbol(str):
+    pass
+
+
+def Sym(s, symbol_table={}):
+    "Find or create the unique, interned Symbol for str s."
+    x = symbol_table.get(s)
+    if x is None:
+        x = Symbol(sys.intern(s))
+        symbol_table[s] = x
+    return x
+
+
+_quote = Sym('quote')
+_quasiquote = Sym('quasiquote')
+_unquote = Sym('unquote')
+_unquotesplicing = Sym('unquote-splicing')
+
+eof_object = Symbol('#<eof-object>')
+
+# token kinds returned by scan()
+LPAREN, RPAREN, STRING, SYMBOL, QUOTE, COMMA_AT, EOF = range(7)
+
+# byte values the scanner dispatches on (indexing bytes yields ints)
+_LPAR, _RPAR, _SQUOTE, _BQUOTE, _COMMA, _AT, _DQUOTE, _SEMI = b"()'`,@\";"
+
+# multi-character runs; each is a single small DFA with no alternation,
+# so SRE chews through them at C speed
+_SYM_RE = re.compile(rb'''[^\s('"`,;)]+''')
+_STR_RE = re.compile(rb'"(?:[\\].|[^\\"])*"?')
+
+
+def scan(buf: 'bytes | mmap.mmap', pos: int) -> tuple[int, int, int]:
+    """Scan one token starting at pos; return (kind, start, end).
+
+    buf is the raw bytes of the input or the mmap of the file; both
+    index to ints, slice to bytes and support find()/regex matching.
+    Single-byte tokens are dispatched by a cheap peek; only the
+    multi-byte runs (symbols, strings) drop into a precompiled regex,
+    whose inner loop runs in C.
+    """
+    n = len(buf)
+    while True:
+        # the full ASCII \s class, to agree with the regexes below
+        while pos < n and buf[pos] in b' \t\r\n\x0b\x0c':
+            pos += 1
+        if pos >= n:
+            return EOF, pos, pos
+        c = buf[pos]
+        if c == _LPAR:
+            return LPAREN, pos, pos + 1
+        if c == _RPAR:
+            return RPAREN, pos, pos + 1
+        if c == _SQUOTE or c == _BQUOTE:
+            return QUOTE, pos, pos + 1
+        if c == _COMMA:
+            if pos + 1 < n and buf[pos + 1] == _AT:
+                return COMMA_AT, pos, pos + 2
+            return QUOTE, pos, pos + 1
+        if c == _DQUOTE:
+            m = _STR_RE.match(buf, pos)
+            assert m is not None    # the pattern matches any leading quote
+            return STRING, pos, m.end()
+        if c == _SEMI:
+            pos = buf.find(b'\n', pos)
+            if pos < 0:
+                pos = n
+            continue
+        m = _SYM_RE.match(buf, pos)
+        # _SYM_RE excludes exactly \s plus the dispatched bytes; c is
+        # neither (whitespace was skipped above), so the run is >= 1
+        assert m is not None
+        return SYMBOL, pos, m.end()
+
+
+class Lexer:
+    """Tokenizer over the whole input.
+
+    The file is memory-mapped and scanned in place, so the kernel
+    pages it in on demand and no copy of the input is made; tokens
+    stay bytes until atom() turns them into Python values, so the
+    cp1251 decode is paid only for text that actually escapes the
+    lexer (strings and symbols), not for the whole buffer.
+    """
+
+    quotes = {b"'": _quote, b"`": _quasiquote, b",": _unquote,
+              b",@": _unquotesplicing}
+
+    _buf: 'bytes | mmap.mmap'
+    _pos: int
+
+    def __init__(self, f_in):
+        self.f_in = f_in
+        try:
+            self._buf = mmap.mmap(f_in.fileno(), 0, access=mmap.ACCESS_READ)
+            self._pos = f_in.tell()
+        except (ValueError, OSError):
+            # empty file, or not a real file (e.g. BytesIO)
+            self._buf = f_in.read()
+            self._pos = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if type(self._buf) is not bytes:
+            self._buf.close()
+        self.f_in.close()
+        return False
+
+    @property
+    def l_num(self):
+        "1-based line number at the scan position (error reporting only)."
+        end = self._pos
+        buf = self._buf
+        if type(buf) is not bytes:
+            buf = buf[:end]     # mmap has no count(); copies only on errors
+        return 1 + buf.count(b'\n', 0, end)
+
+    def next_token(self) -> object:
+        "Return the next token as bytes, or eof_object at end of input."
+        kind, start, end = scan(self._buf, self._pos)
+        self._pos = end
+        if kind == EOF:
+            return eof_object
+        return self._buf[start:end]
+
+    def atom(self, token: bytes) -> object:
+        'Numbers become numbers; "..." strings are unquoted; the rest are Symbols.'
+        c = token[0]
+        if c == _DQUOTE:
+            return token[1:-1].decode('cp1251', 'replace')
+        # most tokens are symbols like R12 or ~LC4: only try the
+        # int/float ladder when the first character can start a number,
+        # so no exceptions are raised (and caught) on the common path
+        if c in b'-+.0123456789':
+            try:
+                return int(token)
+            except ValueError:
+                try:
+                    return float(token)
+                except ValueError:
+                    pass
+        return Sym(token.decode('cp1251', 'replace'))
+
+    def read_stream(self):
+        """Read one expression from the token stream.
+
+        Iterative with an explicit stack of open frames, so nesting
+        depth costs a list slot instead of a Python call frame.
+        """
+        quotes = self.quotes
+        stack = []          # enclosing list frames
+        flags = []          # whether the matching frame is a quote wrapper
+        cur = None
+        cur_quote = False
+        while True:
+            tok = self.next_token()
+            if tok == b'(':
+                stack.append(cur)
+                flags.append(cur_quote)
+                cur = []
+                cur_quote = False
+                continue
+            if tok == b')':
+                if cur is None or cur_quote:
+                    raise SyntaxError('unexpected ) at line %d' % self.l_num)
+                x = cur
+                cur = stack.pop()
+                cur_quote = flags.pop()
+            elif tok in quotes:
+                stack.append(cur)
+                flags.append(cur_quote)
+                cur = [quotes[tok]]
+                cur_quote = True
+                continue
+            elif tok is eof_object:
+                if cur is None:
+                    return eof_object
+                raise SyntaxError('unexpected EOF at line %d' % self.l_num)
+            else:
+                x = self.atom(tok)
+            # deliver x, closing any quote wrappers it completes
+            while True:
+                if cur is None:
+                    return x
+                cur.append(x)
+                if not cur_quote:
+                    break
+                x = cur
+                cur = stack.pop()
+                cur_quote = flags.pop()
+
+    def stream(self):
+        "Yield top-level expressions until EOF."
+        while True:
+            x = self.read_stream()
+            if x is eof_object:
+                return
+            yield x
+
+
+class Attr:
+    "Uninterpreted (name value ...) form."
+
+    def __init__(self, name, *values):
+        self.name = name
+        self.values = values
+
+    def __repr__(self):
+        return '(%s %s)' % (self.name, ' '.join(map(repr, self.values)))
+
+
+class asciiHeader:
+    "The asciiHeader form; keeps its attribute forms for reference."
+
+    def __init__(self, *attrs):
+        self.attrs = attrs
+
+
+class Node:
+    "A (node comp_ref pin) form inside a net."
+
+    def __init__(self, comp_ref, pin):
+        self.comp_ref = comp_ref
+        self.pin = pin
+
+
+# link-column net names on the 1621 card, compiled once
+_LC = re.compile(r"LC(\d{1,2})").fullmatch
+_NLC = re.compile(r"~LC(\d{1,2})").fullmatch
+_NTC = re.compile(r"~TC(\d)").fullmatch
+
+
+class CompInst:
+    """A component instance.
+
+    db maps component reference name to instance; by_id is the same
+    set indexed by the dense integer id handed out at construction.
+    """
+
+    db: dict[str, 'CompInst'] = {}
+    by_id: list['CompInst'] = []
+    # per-component 1621 column-link masks, derived on first use
+    link_bits = None
+
+    def __init__(self, name, *attrs):
+        self.name = name
+        self.attrs = {a.name: a.values for a in attrs if isinstance(a, Attr)}
+        # pin number -> net name; filled in as nets are constructed
+        self.pins = {}
+        self.id = len(CompInst.by_id)
+        CompInst.by_id.append(self)
+        self.db_add()
+
+    @classmethod
+    def derive_link_bits(cls):
+        """Derive the column-link bit of every component, once.
+
+        One pass over by_id matching the LC/~LC/~TC patterns against
+        each component's pin 2 and pin 3 nets; the resulting id-indexed
+        mask arrays are cached so repeated ROM recoveries just OR them.
+        """
+        if cls.link_bits is not None and len(cls.link_bits[0]) == len(cls.by_id):
+            return cls.link_bits
+        ncomp = len(cls.by_id)
+        set_bits = [0] * ncomp
+        clr_bits = [0] * ncomp
+        tc2_bits = [0] * ncomp
+        tc3_bits = [0] * ncomp
+        for comp in cls.by_id:
+            l = comp.pins.get('2', '')
+            m = _LC(l)
+            if m:
+                set_bits[comp.id] = 1 << int(m.group(1))
+            else:
+                m = _NLC(l)
+                if m:
+                    clr_bits[comp.id] = 1 << int(m.group(1))
+                else:
+                    m = _NTC(l)
+                    if m:
+                        tc2_bits[comp.id] = 1 << int(m.group(1))
+            m = _NTC(comp.pins.get('3', ''))
+            if m:
+                tc3_bits[comp.id] = 1 << int(m.group(1))
+        cls.link_bits = (set_bits, clr_bits, tc2_bits, tc3_bits)
+        return cls.link_bits
+
+    def db_add(self):
+        prev = self.db.setdefault(self.name, self)
+        if prev is not self:
+            raise KeyError(self.name)
+
+
+class Net:
+    "A net; db maps net name to instance."
+
+    db: dict[str, 'Net'] = {}
+
+    def __init__(self, name, *nodes):
+        self.name = name
+        # structure-of-arrays: parallel component-id / pin columns,
+        # one entry per node; -1 marks a reference to an unknown comp
+        self.node_comp_ids = array('i')
+        self.node_pins = []
+        # reverse index: pin name -> component ids on that pin
+        self._by_pin = {}
+        for node in nodes:
+            comp = CompInst.db.get(node.comp_ref)
+            cid = -1 if comp is None else comp.id
+            self.node_comp_ids.append(cid)
+            self.node_pins.append(node.pin)
+            self._by_pin.setdefault(node.pin, []).append(cid)
+            if comp is not None:
+                comp.pins[node.pin] = name
+        self.db_add()
+
+    def db_add(self):
+        prev = self.db.setdefault(self.name, self)
+        if prev is not self:
+            raise KeyError(self.name)
+
+    @classmethod
+    def get_by_name(cls, name):
+        return cls.db.get(name)
+
+
+# link-row net names, formatted once
+VLINK_NAMES = [f"VLINK_{i:02d}" for i in range(88)]
+TLINK_NAMES = [f"TLINK_{i:02d}" for i in range(100)]
+
+
+class Netlist:
+    "The (netlist name ...) form: component instances plus nets."
+
+    def __init__(self, name, *items):
+        self.name = name
+        self.comps = [i for i in items if isinstance(i, CompInst)]
+        self.nets = [i for i in items if isinstance(i, Net)]
+
+    def comp_by_pin(self, net, npin):
+        "Return the single component attached to net through pin npin."
+        cids = net._by_pin.get(npin, ())
+        if len(cids) != 1 or cids[0] < 0:
+            sys.exit('net %s: expected one component on pin %s, got %d'
+                     % (net.name, npin, len(cids)))
+        return CompInst.by_id[cids[0]]
+
+    def proc_1621(self, verbose=False):
+        """Recover the decode ROMs of the 1621 card from its link nets.
+
+        Each VLINK_nn row runs through link diodes whose pin 2 lands on
+        an LCk / ~LCk column net: a link to LCk forces bit k of the row
+        pattern to 1, a link to ~LCk forces it to 0, no link is a
+        don't-care.  Pin 3 links to ~TCd columns give the row its tc
+        value.  TLINK_nn rows encode the tc ROM the same way through
+        pin 2.
+        """
+        vnets = [Net.db.get(nm) for nm in VLINK_NAMES]
+        missing = [nm for nm, v in zip(VLINK_NAMES, vnets) if v is None]
+        if missing:
+            sys.exit("missing nets: %s" % ", ".join(missing))
+        set_bits, clr_bits, tc2_bits, tc3_bits = CompInst.derive_link_bits()
+        rows = []
+        for i, vnet in enumerate(vnets):
+            drv = self.comp_by_pin(vnet, '2')
+            if verbose:
+                print(f"; {VLINK_NAMES[i]} driven by {drv.name}")
+            seta = 0
+            clra = 0
+            vlitc_val = 0
+            for cid in vnet.node_comp_ids:
+                if cid >= 0:
+                    seta |= set_bits[cid]
+                    clra |= clr_bits[cid]
+                    vlitc_val |= tc3_bits[cid]
+            rows.append((seta, clra, vlitc_val, i))
+        # stringify in one go: format the set bits, then splice in the
+        # don't-cares, instead of 11 string prepends per row; alongside
+        # the pattern, fold each position into a base-3 integer key
+        # ('0' < '1' < 'x') so the sort compares ints, not 11-char
+        # strings
+        entries = []
+        vlitc = []
+        for seta, clra, vlitc_val, i in rows:
+            s = bytearray(format(seta & 0x7FF, '011b'), 'ascii')
+            dc = ~(seta | clra) & 0x7FF
+            key = 0
+            for j in range(11):
+                b = 1 << (10 - j)
+                if dc & b:
+                    s[j] = ord('x')
+                    key = key * 3 + 2
+                else:
+                    key = key * 3 + (1 if seta & b else 0)
+            entries.append((key, s.decode('ascii'), i))
+            vlitc.append(vlitc_val)
+        entries.sort()
+        # collect every line and flush once: one writelines instead of
+        # a print (and a stdout lock) per row
+        out = [f"assign pl[{i}] = cmp(lc, 11'b{l});\n" for _, l, i in entries]
+        out += [f"    7'd{i:02d}: litc = 7'h{v:02X};\n"
+                for i, v in enumerate(vlitc)]
+        tnets = [Net.db.get(nm) for nm in TLINK_NAMES]
+        missing = [nm for nm, t in zip(TLINK_NAMES, tnets) if t is None]
+        if missing:
+            sys.exit("missing nets: %s" % ", ".join(missing))
+        for i, tnet in enumerate(tnets):
+            val = 0
+            for cid in tnet.node_comp_ids:
+                if cid >= 0:
+                    val |= tc2_bits[cid]
+            out.append(f"    7'd{i:02d}: tc = 7'h{val:02X};\n")
+        sys.stdout.writelines(out)
+
+
+global_env = {
+    Sym('asciiHeader'): asciiHeader,
+    Sym('netlist'): Netlist,
+    Sym('compInst'): CompInst,
+    Sym('net'): Net,
+    Sym('node'): Node,
+}
+
+
+def eval(x, env=global_env):
+    """Turn an expression into a Python object: apply the head constructor.
+
+    Iterative post-order walk over the tree with an explicit stack of
+    (source form, evaluated args) frames -- no Python recursion -- and
+    type(x) identity dispatch instead of isinstance chains.
+    """
+    if type(x) is not list:
+        if type(x) is Symbol:
+            return env[x] if x in env else x
+        return x
+    stack = [(x, [])]
+    while True:
+        src, out = stack[-1]
+        i = len(out) + 1        # element 0 is the head, not an argument
+        if i < len(src):
+            a = src[i]
+            if type(a) is list:
+                stack.append((a, []))
+            elif type(a) is Symbol:
+                out.append(env[a] if a in env else a)
+            else:
+                out.append(a)
+            continue
+        proc = env.get(src[0])
+        val = Attr(str(src[0]), *out) if proc is None else proc(*out)
+        stack.pop()
+        if not stack:
+            return val
+        stack[-1][1].append(val)
+
+
+def parse_file(fname):
+    "Open a netlist file, check its signature and return a Lexer over it."
+    f_in = open(fname, 'rb')
+    line = f_in.readline()
+    if not line.startswith(b'ACCEL_ASCII'):
+        sys.exit('%s: not an ACCEL_ASCII netlist' % fname)
+    return Lexer(f_in)
+
+
+def process_netlist(nl, arch, verbose=False):
+    if arch == '1621':
+        nl.proc_1621(verbose)
+    else:
+        sys.exit('unknown arch %r' % arch)
+
+
+def main():
+    ap = argparse.ArgumentParser(
+        description='Parse a P-CAD ASCII netlist and recover board ROMs')
+    ap.add_argument('fname', help='netlist file (.net)')
+    ap.add_argument('-a', '--arch', default='1621',
+                    help='board architecture to process (default: 1621)')
+    ap.add_argument('-v', '--verbose', action='store_true')
+    args = ap.parse_args()
+    with parse_file(args.fname) as lex:
+        for x in lex.stream():
+            obj = eval(x)
+            del x                   # drop the token tree before processing
+            if isinstance(obj, asciiHeader):
+                header = obj        # noqa: F841 -- kept for reference
+            elif isinstance(obj, Netlist):
+                process_netlist(obj, args.arch, args.verbose)
+
+
+if __name__ == '__main__':
+    main()